@@ -1,7 +1,11 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 import pandas as pd
 import sqlite3
 import os
+import io
+import csv
+import json
+import zlib
 from functools import lru_cache
 
 app = Flask(__name__)
@@ -9,6 +13,11 @@ app = Flask(__name__)
 # Configurações
 DATABASE_PATH = 'data/processed/ans.db'
 CACHE_TIMEOUT = 300  # 5 minutos
+EXPORT_BATCH_SIZE = 1000  # Linhas lidas do cursor por iteração
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
 
 @lru_cache(maxsize=128)
 def load_operadoras():
@@ -26,6 +35,10 @@ def load_operadoras():
         print(f"Erro ao carregar operadoras: {str(e)}")
         return []
 
+def safe_to_str(value):
+    """Conversão segura para texto minúsculo, usada como regra única de busca"""
+    return str(value).lower() if value is not None else ''
+
 @app.route('/api/operadoras', methods=['GET'])
 def search_operadoras():
     """Endpoint para busca de operadoras com tratamento seguro de tipos"""
@@ -38,10 +51,6 @@ def search_operadoras():
         # Carrega dados (com cache)
         operadoras = load_operadoras()
         
-        # Função auxiliar para conversão segura
-        def safe_to_str(value):
-            return str(value).lower() if value is not None else ''
-        
         # Filtra resultados de forma segura
         if search_term:
             results = []
@@ -79,6 +88,153 @@ def search_operadoras():
             'message': 'Não foi possível processar a requisição'
         }), 500
 
+def open_export_cursor(query, params):
+    """
+    Executa a query de exportação antes do início do streaming, para que erros
+    de banco ainda possam ser respondidos com o JSON de erro
+    """
+    # mode=ro evita criar um ans.db vazio quando o arquivo não existe
+    conn = sqlite3.connect(f'file:{DATABASE_PATH}?mode=ro', uri=True)
+    try:
+        # Mesma conversão do filtro em Python (LOWER do SQLite só trata ASCII)
+        conn.create_function('py_lower', 1, safe_to_str)
+        cursor = conn.execute(query, params)
+        columns = [col[0] for col in cursor.description]
+        return conn, cursor, columns
+    except Exception:
+        conn.close()
+        raise
+
+def stream_rows(conn, cursor, columns, export_format, compress):
+    """Gera o resultado do cursor em lotes, sem carregar tudo em memória"""
+    try:
+        compressor = zlib.compressobj(wbits=31) if compress else None  # 31 = formato gzip
+
+        def emit(text):
+            data = text.encode('utf-8')
+            return compressor.compress(data) if compressor else data
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+        if export_format == 'csv':
+            writer.writerow(columns)
+
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+
+            if export_format == 'csv':
+                writer.writerows(rows)
+            else:
+                for row in rows:
+                    buffer.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str))
+                    buffer.write('\n')
+
+            chunk = emit(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+            if chunk:
+                yield chunk
+
+        chunk = emit(buffer.getvalue())
+        if compressor:
+            chunk += compressor.flush()
+        if chunk:
+            yield chunk
+    finally:
+        conn.close()
+
+def export_response(query, params, filename):
+    """Monta a resposta de exportação a partir dos parâmetros da requisição"""
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({
+            'error': 'Formato inválido',
+            'message': f"Formatos suportados: {', '.join(EXPORT_FORMATS)}"
+        }), 400
+
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'sim')
+    conn, cursor, columns = open_export_cursor(query, params)
+
+    # Com gzip o arquivo entregue é o .gz em si (sem Content-Encoding)
+    if compress:
+        mimetype = 'application/gzip'
+        filename = f'{filename}.{export_format}.gz'
+    else:
+        mimetype = EXPORT_FORMATS[export_format]
+        filename = f'{filename}.{export_format}'
+
+    response = Response(
+        stream_with_context(stream_rows(conn, cursor, columns, export_format, compress)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+    # Garante o fechamento mesmo se o cliente desconectar antes do streaming
+    response.call_on_close(conn.close)
+    return response
+
+@app.route('/api/operadoras/export', methods=['GET'])
+def export_operadoras():
+    """Endpoint para exportação completa das operadoras em streaming"""
+    try:
+        search_term = request.args.get('q', '').lower()
+
+        query = """
+        SELECT registro_ans, cnpj, razao_social, nome_fantasia, modalidade
+        FROM operadoras
+        """
+        params = ()
+
+        # Mesmo critério de busca do endpoint paginado, aplicado no SQLite
+        if search_term:
+            query += """
+            WHERE instr(py_lower(registro_ans), ?) > 0
+               OR instr(py_lower(razao_social), ?) > 0
+               OR instr(py_lower(cnpj), ?) > 0
+               OR instr(py_lower(nome_fantasia), ?) > 0
+            """
+            params = (search_term,) * 4
+
+        return export_response(query, params, 'operadoras')
+
+    except Exception as e:
+        app.logger.error(f"Erro na exportação: {str(e)}", exc_info=True)
+        return jsonify({
+            'error': 'Erro interno no servidor',
+            'message': 'Não foi possível processar a exportação'
+        }), 500
+
+@app.route('/api/operadoras/<registro_ans>/demonstracoes/export', methods=['GET'])
+def export_demonstracoes(registro_ans):
+    """Endpoint para exportação das demonstrações de uma operadora em streaming"""
+    try:
+        conn = sqlite3.connect(f'file:{DATABASE_PATH}?mode=ro', uri=True)
+        try:
+            exists = conn.execute(
+                "SELECT 1 FROM operadoras WHERE registro_ans = ?",
+                (registro_ans,)
+            ).fetchone()
+        finally:
+            conn.close()
+
+        if not exists:
+            return jsonify({'message': 'Operadora não encontrada'}), 404
+
+        query = """
+        SELECT data, codigo_conta, descricao, valor, ano, trimestre
+        FROM demonstracoes
+        WHERE registro_ans = ?
+        ORDER BY data DESC
+        """
+        return export_response(query, (registro_ans,), f'demonstracoes_{registro_ans}')
+
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'message': 'Erro ao exportar demonstrações'
+        }), 500
+
 @app.route('/api/operadoras/<registro_ans>', methods=['GET'])
 def get_operadora(registro_ans):
     """Endpoint para detalhes de uma operadora específica"""
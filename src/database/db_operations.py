@@ -8,6 +8,14 @@ import sqlite3
 import sys
 import time
 
+# Permite executar este arquivo diretamente (python src/database/db_operations.py)
+if __package__ in (None, ''):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.storage.artifact_store import (
+    CHUNK_SIZE, save_download, latest_digest, link_object, object_path, remove_link
+)
+
 def setup_database():
     """Cria e conecta ao banco de dados SQLite"""
     try:
@@ -51,15 +59,20 @@ def setup_database():
         raise
 
 def download_file_with_retry(url, destination, max_retries=3):
-    """Baixa um arquivo com mecanismo de retentativa"""
+    """
+    Baixa um arquivo com mecanismo de retentativa, gravando-o no store
+    Retorna:
+        bool: True se o conteúdo mudou desde o último download
+    """
     for attempt in range(max_retries):
         try:
-            response = requests.get(url, timeout=30)
+            response = requests.get(url, stream=True, timeout=30)
             response.raise_for_status()
             
-            with open(destination, 'wb') as f:
-                f.write(response.content)
-            return True
+            digest, changed = save_download(response.iter_content(chunk_size=CHUNK_SIZE), destination)
+            if not changed:
+                print(f"{os.path.basename(destination)} sem alterações ({digest[:12]})")
+            return changed
                 
         except Exception as e:
             if attempt == max_retries - 1:
@@ -100,7 +113,9 @@ def download_demonstracoes_contabeis():
                     file_path = f'{dest_dir}/{file}'
                     
                     print(f"Baixando {file}...")
-                    if download_file_with_retry(file_url, file_path):
+                    changed = download_file_with_retry(file_url, file_path)
+                    # Só reextrai se o conteúdo mudou ou se a extração ainda não existe
+                    if changed or not os.path.isdir(os.path.splitext(file_path)[0]):
                         downloaded_files.append(file_path)
                     
         except Exception as e:
@@ -274,8 +289,8 @@ def download_ans_data():
         # 1. Baixar operadoras ativas
         operadoras_url = "https://dadosabertos.ans.gov.br/FTP/PDA/operadoras_de_plano_de_saude_ativas/Relatorio_cadop.csv"
         print("\nBaixando operadoras ativas...")
-        if not download_file_with_retry(operadoras_url, 'data/raw/operadoras_ativas.csv'):
-            raise Exception("Falha ao baixar operadoras ativas")
+        # Cada versão fica preservada no store; o arquivo em data/raw aponta para a mais recente
+        download_file_with_retry(operadoras_url, 'data/raw/operadoras_ativas.csv')
         
         # 2. Baixar demonstrações contábeis
         downloaded_files = download_demonstracoes_contabeis()
@@ -289,9 +304,19 @@ def download_ans_data():
         
     except Exception as e:
         print(f"\nErro geral no download: {str(e)}")
-        # Cria arquivo vazio para permitir continuidade
-        with open('data/raw/operadoras_ativas.csv', 'w') as f:
-            f.write("Registro ANS;CNPJ;Razão Social\n")
+        operadoras_path = 'data/raw/operadoras_ativas.csv'
+        digest = latest_digest(operadoras_path)
+        if digest and os.path.exists(object_path(digest)):
+            # Restaura a última versão baixada com sucesso
+            link_object(digest, operadoras_path)
+            print(f"Usando última versão das operadoras ({digest[:12]})")
+        else:
+            # Cria arquivo vazio para permitir continuidade
+            # (remove antes para não truncar um objeto compartilhado com o store)
+            if os.path.exists(operadoras_path):
+                remove_link(operadoras_path)
+            with open(operadoras_path, 'w') as f:
+                f.write("Registro ANS;CNPJ;Razão Social\n")
         return False
 
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+from datetime import datetime
+
+# Configurações
+STORE_DIR = os.path.join('data', 'store')
+OBJECTS_DIR = os.path.join(STORE_DIR, 'objects')
+HISTORY_PATH = os.path.join(STORE_DIR, 'history.csv')
+CHUNK_SIZE = 8192
+
+def object_path(digest):
+    """Retorna o caminho do objeto no store a partir do seu hash"""
+    return os.path.join(OBJECTS_DIR, digest[:2], digest[2:])
+
+def store_chunks(chunks):
+    """
+    Grava um fluxo de bytes no store calculando o SHA-256 durante a escrita
+    Retorna:
+        str: Hash do conteúdo (o objeto é gravado uma única vez)
+    """
+    os.makedirs(OBJECTS_DIR, exist_ok=True)
+    sha256 = hashlib.sha256()
+
+    fd, tmp_path = tempfile.mkstemp(dir=STORE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                if chunk:
+                    sha256.update(chunk)
+                    f.write(chunk)
+
+        digest = sha256.hexdigest()
+        path = object_path(digest)
+
+        # Conteúdo já existente: descarta a cópia temporária
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+
+        # mkstemp cria com 0600; volta às permissões usuais de leitura
+        os.chmod(path, 0o644)
+        return digest
+
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def remove_link(path):
+    """Remove um link para um objeto do store, mesmo se marcado como somente leitura"""
+    # No Windows os.remove falha em arquivos somente leitura
+    if not os.access(path, os.W_OK):
+        os.chmod(path, stat.S_IREAD | stat.S_IWRITE)
+    os.remove(path)
+
+def link_object(digest, destination):
+    """
+    Expõe um objeto do store em outro caminho via hardlink (cópia só se o
+    sistema de arquivos não suportar links)
+    """
+    source = object_path(digest)
+    os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+
+    if os.path.exists(destination):
+        if os.path.samefile(source, destination):
+            return destination
+        # Remove antes de recriar para nunca escrever sobre um objeto compartilhado
+        remove_link(destination)
+
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+    return destination
+
+def latest_digest(name):
+    """Retorna o hash da versão mais recente registrada para o nome informado"""
+    if not os.path.exists(HISTORY_PATH):
+        return None
+
+    digest = None
+    with open(HISTORY_PATH, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.rstrip('\n').split(';')
+            if len(parts) == 3 and parts[1] == name:
+                digest = parts[2]
+    return digest
+
+def record_snapshot(name, digest):
+    """
+    Registra uma nova versão no histórico, se o conteúdo mudou
+    Retorna:
+        bool: True se o conteúdo é diferente da última versão registrada
+    """
+    if latest_digest(name) == digest:
+        return False
+
+    os.makedirs(STORE_DIR, exist_ok=True)
+    with open(HISTORY_PATH, 'a', encoding='utf-8') as f:
+        f.write(f"{datetime.now().isoformat(timespec='seconds')};{name};{digest}\n")
+    return True
+
+def save_download(chunks, *destinations):
+    """
+    Grava um download no store e cria os links nos destinos informados
+    Retorna:
+        tuple: (hash do conteúdo, True se houve mudança desde a última versão)
+    """
+    digest = store_chunks(chunks)
+
+    # Só registra a versão depois que todos os destinos apontam para ela
+    for destination in destinations:
+        link_object(digest, destination)
+
+    changed = record_snapshot(destinations[0], digest)
+    return digest, changed
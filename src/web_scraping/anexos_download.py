@@ -2,8 +2,8 @@ import requests
 from bs4 import BeautifulSoup
 import zipfile
 import os
-import shutil
 from datetime import datetime
+from src.storage.artifact_store import CHUNK_SIZE, save_download
 
 def download_anexos():
     """
@@ -52,6 +52,7 @@ def download_anexos():
 
         # 2. Download dos arquivos
         downloaded_files = []
+        any_changed = False
         for nome, url in anexos.items():
             file_path = os.path.join(raw_dir, nome)
             backup_path = os.path.join(backup_dir, nome)
@@ -62,21 +63,24 @@ def download_anexos():
             response = session.get(url, stream=True, timeout=120)
             response.raise_for_status()
             
-            # Salva na pasta raw e no backup
-            with open(file_path, 'wb') as f, open(backup_path, 'wb') as bf:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-                    bf.write(chunk)
+            # Grava uma única vez no store; raw e backup são hardlinks para o mesmo conteúdo
+            digest, changed = save_download(response.iter_content(chunk_size=CHUNK_SIZE), file_path, backup_path)
             
             downloaded_files.append(file_path)
-            print(f"{datetime.now().strftime('%H:%M:%S')} - {nome} salvo em {file_path}")
+            any_changed = any_changed or changed
+            status = "salvo" if changed else "sem alterações"
+            print(f"{datetime.now().strftime('%H:%M:%S')} - {nome} {status} em {file_path} ({digest[:12]})")
 
         # 3. Criação do ZIP (mantém os arquivos originais)
         zip_path = os.path.join(raw_dir, "Anexos.zip")
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for file_path in downloaded_files:
-                zipf.write(file_path, os.path.basename(file_path))
-                print(f"{datetime.now().strftime('%H:%M:%S')} - {os.path.basename(file_path)} adicionado ao ZIP")
+        if not any_changed and os.path.exists(zip_path):
+            # Nenhum anexo mudou: o ZIP existente continua válido
+            print(f"{datetime.now().strftime('%H:%M:%S')} - Anexos sem alterações, {zip_path} mantido")
+        else:
+            with zipfile.ZipFile(zip_path, 'w') as zipf:
+                for file_path in downloaded_files:
+                    zipf.write(file_path, os.path.basename(file_path))
+                    print(f"{datetime.now().strftime('%H:%M:%S')} - {os.path.basename(file_path)} adicionado ao ZIP")
 
         print(f"{datetime.now().strftime('%H:%M:%S')} - Processo concluído com sucesso!")
         return True